@@ -21,22 +21,28 @@ Categories:
 """
 
 import argparse
+import asyncio
+import json
 import os
+import struct
 import sys
 import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 try:
-    import requests
+    import httpx
 except ImportError:
-    print("Error: 'requests' package is required. Install with: pip install requests")
+    print("Error: 'httpx' package is required. Install with: pip install 'httpx[http2]'")
     sys.exit(1)
 
 try:
-    from PIL import Image
+    import orjson  # much faster parser for the feed pages; optional
 except ImportError:
-    print("Error: 'Pillow' package is required. Install with: pip install Pillow")
-    sys.exit(1)
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
 
 
 FEED_URL = "https://colorhunt.co/php/feed.php"
@@ -50,6 +56,13 @@ CATEGORIES = [
 
 SORT_OPTIONS = ["new", "popular", "random"]
 
+# How many feed pages are in flight at once. The feed API is tiny JSON, so
+# latency dominates — fetching a window of steps concurrently hides it.
+CONCURRENCY = 16
+MAX_RETRIES = 4
+PAGE_SIZE = 20  # palettes per feed page
+SPECULATIVE_SLACK = 3  # extra pages in the opening burst, for dupes/short pages
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0",
     "Referer": "https://colorhunt.co/",
@@ -59,38 +72,270 @@ HEADERS = {
 }
 
 
-def parse_palette_code(code: str) -> list[str]:
-    """Parse a 24-char hex code into 4 hex color strings."""
+def _png_chunk(ctype: bytes, data: bytes) -> bytes:
+    """Wrap data in a PNG chunk: length, type, data, CRC32."""
+    return (struct.pack(">I", len(data)) + ctype + data
+            + struct.pack(">I", zlib.crc32(ctype + data)))
+
+
+# The image is indexed-color (type 3) at 2 bits/pixel: row i is always
+# palette index i, so everything except the 12-byte PLTE is constant —
+# signature, IHDR (width=1, height=4, depth=2), the IDAT holding the four
+# fixed scanlines (filter byte 0 + index in the top two bits), and IEND.
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+_PNG_IHDR = _png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 4, 2, 3, 0, 0, 0))
+_PNG_IDAT = _png_chunk(b"IDAT", zlib.compress(b"\x00\x00\x00\x40\x00\x80\x00\xc0", 1))
+_PNG_IEND = _png_chunk(b"IEND", b"")
+
+
+def generate_palette_image(code: str, filepath: Path) -> None:
+    """Generate a 1x4 PNG with one pixel per color (top to bottom).
+
+    The file is assembled by hand — a 70-odd byte PNG doesn't warrant a
+    full image library's encoder path. With the fixed indexed-color
+    layout above, the only per-palette work is dropping the decoded hex
+    code into a PLTE chunk between the precomputed pieces.
+    """
     if len(code) != 24:
         raise ValueError(f"Invalid palette code length: {len(code)} (expected 24)")
-    return [f"#{code[i*6:(i+1)*6].upper()}" for i in range(4)]
+    plte = _png_chunk(b"PLTE", bytes.fromhex(code))
+    with open(filepath, "wb") as f:
+        f.write(_PNG_SIG + _PNG_IHDR + plte + _PNG_IDAT + _PNG_IEND)
 
 
-def generate_palette_image(colors: list[str], filepath: Path) -> None:
-    """Generate a 1x4 PNG with one pixel per color (top to bottom)."""
-    img = Image.new("RGB", (1, 4))
-    for i, color in enumerate(colors):
-        r = int(color[1:3], 16)
-        g = int(color[3:5], 16)
-        b = int(color[5:7], 16)
-        img.putpixel((0, i), (r, g, b))
-    img.save(filepath, "PNG")
+def _generate_one(task: tuple[str, Path]) -> str | None:
+    """Pool worker: render one palette image. Returns an error message or None."""
+    code, filepath = task
+    try:
+        generate_palette_image(code, filepath)
+        return None
+    except Exception as e:
+        return str(e)
 
 
-def fetch_palettes(step: int, sort: str, tags: str, timeframe: int = 30) -> list[dict]:
-    """Fetch a page of palettes from the ColorHunt feed API."""
+async def fetch_palettes(
+    client: httpx.AsyncClient,
+    sem: asyncio.Semaphore,
+    step: int,
+    sort: str,
+    tags: str,
+    timeframe: int = 30,
+) -> list[dict]:
+    """Fetch a page of palettes from the ColorHunt feed API.
+
+    Retries with exponential backoff on transport and HTTP errors; the
+    semaphore caps how many requests are in flight at once.
+    """
     data = {
         "step": step,
         "sort": sort,
         "tags": tags,
         "timeframe": timeframe,
     }
-    resp = requests.post(FEED_URL, data=data, headers=HEADERS, timeout=15)
-    resp.raise_for_status()
-    text = resp.text.strip()
-    if not text or text == "[]":
-        return []
-    return resp.json()
+    backoff = 1.0
+    for attempt in range(MAX_RETRIES):
+        try:
+            async with sem:
+                resp = await client.post(FEED_URL, data=data)
+            resp.raise_for_status()
+            text = resp.text.strip()
+            if not text or text == "[]":
+                return []
+            return _json_loads(resp.content)
+        except httpx.HTTPError:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            await asyncio.sleep(backoff)
+            backoff *= 2
+    return []
+
+
+async def collect_codes(
+    queue: asyncio.Queue,
+    limit: int,
+    category: str,
+    sort: str,
+    delay: float,
+    timeframe: int,
+) -> list[str]:
+    """Phase 1 producer: fetch palette codes, a rolling window of pages at
+    a time, pushing each new code onto the queue as soon as it arrives.
+
+    Sends a None sentinel when the crawl is done and returns the codes
+    in arrival order.
+    """
+    seen: set[str] = set()  # O(1) dedup; the list keeps arrival order
+    collected_codes: list[str] = []
+    step = 0
+    empty_pages = 0
+    max_empty = 3  # stop after 3 consecutive empty responses
+
+    sem = asyncio.Semaphore(CONCURRENCY)
+    # With http2 the whole window multiplexes over one TLS connection;
+    # the limits only matter on the HTTP/1.1 fallback, where they keep
+    # the same keep-alive sockets reused across windows.
+    limits = httpx.Limits(
+        max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY
+    )
+    # The limit tells us how many pages should suffice, so issue them all
+    # speculatively in the opening burst (the semaphore still meters how
+    # many are in flight); fall back to window-sized probing only if the
+    # burst came up short.
+    window_size = (limit + PAGE_SIZE - 1) // PAGE_SIZE + SPECULATIVE_SLACK
+
+    try:
+        async with httpx.AsyncClient(
+            http2=True, headers=HEADERS, timeout=15, limits=limits
+        ) as client:
+            while len(collected_codes) < limit and empty_pages < max_empty:
+                window = range(step, step + window_size)
+                results = await asyncio.gather(
+                    *(fetch_palettes(client, sem, s, sort, category, timeframe)
+                      for s in window),
+                    return_exceptions=True,
+                )
+
+                for s, palettes in zip(window, results):
+                    if isinstance(palettes, BaseException):
+                        print(f"  [!] API request failed (step={s}): {palettes}")
+                        empty_pages += 1
+                        if empty_pages >= max_empty:
+                            print("  [!] Too many consecutive failures, stopping.")
+                            break
+                        continue
+
+                    if not palettes:
+                        empty_pages += 1
+                        if empty_pages >= max_empty:
+                            print(f"  Reached end of results after {s} pages.")
+                            break
+                        continue
+
+                    empty_pages = 0  # reset on success
+
+                    for item in palettes:
+                        code = item.get("code") or ""
+                        if len(code) == 24 and code not in seen:
+                            seen.add(code)
+                            collected_codes.append(code)
+                            await queue.put(code)
+                            if len(collected_codes) >= limit:
+                                break
+
+                    print(f"  Fetched page {s}: got {len(palettes)} palettes "
+                          f"({len(collected_codes)}/{limit} collected)")
+
+                    if len(collected_codes) >= limit:
+                        break
+
+                step += window_size
+                window_size = CONCURRENCY  # probe past the burst in windows
+                if len(collected_codes) < limit and empty_pages < max_empty and delay:
+                    await asyncio.sleep(delay)
+    finally:
+        await queue.put(None)
+
+    return collected_codes
+
+
+CACHE_FILENAME = ".colorhunt_cache.json"
+
+
+def _load_cached_codes(output_dir: Path, limit: int, ttl: float) -> list[str] | None:
+    """Return cached palette codes if the cache is fresh and large enough."""
+    try:
+        with open(output_dir / CACHE_FILENAME) as f:
+            cache = json.load(f)
+        if time.time() - cache["ts"] < ttl and len(cache["codes"]) >= limit:
+            return cache["codes"][:limit]
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _save_cached_codes(output_dir: Path, codes: list[str]) -> None:
+    """Persist collected codes next to the images (atomic rename)."""
+    tmp = output_dir / (CACHE_FILENAME + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"ts": time.time(), "codes": codes}, f)
+    os.replace(tmp, output_dir / CACHE_FILENAME)
+
+
+async def run_pipeline(
+    output_dir: Path,
+    limit: int,
+    category: str,
+    sort: str,
+    delay: float,
+    timeframe: int,
+    cache_ttl: float,
+) -> tuple[int, int, int, int]:
+    """Run the feed crawl and image generation as a pipeline.
+
+    Codes flow from the Phase 1 producer through a bounded queue into a
+    process pool, so the first images are written while later feed pages
+    are still in flight. A fresh enough code cache from a previous run
+    replaces the crawl entirely. Returns (collected, created, skipped,
+    errors).
+    """
+    # One directory scan instead of a stat() per palette
+    existing = {e.name[:-4] for e in os.scandir(output_dir) if e.name.endswith(".png")}
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+    loop = asyncio.get_running_loop()
+    created = skipped = errors = done = 0
+
+    with ProcessPoolExecutor() as pool:
+
+        async def render(code: str) -> None:
+            nonlocal created, skipped, errors, done
+            if code in existing:
+                skipped += 1
+                return
+            error = await loop.run_in_executor(
+                pool, _generate_one, (code, output_dir / f"{code}.png"))
+            done += 1
+            if error:
+                print(f"  [!] Error generating {code}: {error}")
+                errors += 1
+            else:
+                created += 1
+            # Progress every 25 images
+            if done % 25 == 0:
+                print(f"  Progress: {done} images "
+                      f"(created: {created}, skipped: {skipped}, errors: {errors})")
+
+        async def consume() -> None:
+            tasks = []
+            while (code := await queue.get()) is not None:
+                tasks.append(asyncio.create_task(render(code)))
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        cached = _load_cached_codes(output_dir, limit, cache_ttl)
+        if cached is not None:
+            print(f"  Using {len(cached)} palette codes from cache "
+                  f"(less than {cache_ttl:.0f}s old), skipping the crawl.")
+
+            async def replay_cache() -> list[str]:
+                for code in cached:
+                    await queue.put(code)
+                await queue.put(None)
+                return cached
+
+            producer = asyncio.create_task(replay_cache())
+        else:
+            producer = asyncio.create_task(
+                collect_codes(queue, limit, category, sort, delay, timeframe))
+
+        consumer = asyncio.create_task(consume())
+        codes = await producer
+        await consumer
+
+    if cached is None and codes:
+        _save_cached_codes(output_dir, codes)
+
+    return len(codes), created, skipped, errors
 
 
 def crawl_and_download(
@@ -100,91 +345,27 @@ def crawl_and_download(
     sort: str,
     delay: float,
     timeframe: int,
+    cache_ttl: float,
 ) -> None:
-    """Main crawl loop: fetch palette codes from API, generate images locally."""
+    """Main crawl: fetch palette codes from the API and generate images
+    locally, pipelined so rendering overlaps the remaining fetches."""
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    collected_codes: list[str] = []
-    step = 0
-    empty_pages = 0
-    max_empty = 3  # stop after 3 consecutive empty responses
-
     print(f"Output directory: {output_dir.resolve()}")
     print(f"Target: {limit} palettes | Sort: {sort} | Category: {category or 'all'}")
-    print(f"Delay between API requests: {delay}s")
+    print(f"Concurrent API requests: {CONCURRENCY} | Delay between windows: {delay}s")
     print()
 
-    # Phase 1: Collect palette codes from the API
-    while len(collected_codes) < limit:
-        try:
-            palettes = fetch_palettes(step, sort, category, timeframe)
-        except requests.RequestException as e:
-            print(f"  [!] API request failed (step={step}): {e}")
-            empty_pages += 1
-            if empty_pages >= max_empty:
-                print("  [!] Too many consecutive failures, stopping.")
-                break
-            time.sleep(delay * 2)
-            step += 1
-            continue
-
-        if not palettes:
-            empty_pages += 1
-            if empty_pages >= max_empty:
-                print(f"  Reached end of results after {step} pages.")
-                break
-            step += 1
-            time.sleep(delay)
-            continue
-
-        empty_pages = 0  # reset on success
-
-        for item in palettes:
-            code = item.get("code", "")
-            if len(code) == 24 and code not in collected_codes:
-                collected_codes.append(code)
-                if len(collected_codes) >= limit:
-                    break
-
-        print(f"  Fetched page {step}: got {len(palettes)} palettes "
-              f"({len(collected_codes)}/{limit} collected)")
-
-        step += 1
-        time.sleep(delay)
-
-    if not collected_codes:
+    collected, created, skipped, errors = asyncio.run(
+        run_pipeline(output_dir, limit, category, sort, delay, timeframe, cache_ttl)
+    )
+
+    if not collected:
         print("No palettes found. Check your category/sort options.")
         return
 
-    print(f"\nCollected {len(collected_codes)} palette codes. Generating images...\n")
-
-    # Phase 2: Generate images locally
-    created = 0
-    skipped = 0
-    errors = 0
-
-    for i, code in enumerate(collected_codes, 1):
-        filepath = output_dir / f"{code}.png"
-
-        if filepath.exists():
-            skipped += 1
-            continue
-
-        try:
-            colors = parse_palette_code(code)
-            generate_palette_image(colors, filepath)
-            created += 1
-        except Exception as e:
-            print(f"  [!] Error generating {code}: {e}")
-            errors += 1
-            continue
-
-        # Progress every 25 images or on the last one
-        if i % 25 == 0 or i == len(collected_codes):
-            print(f"  Progress: {i}/{len(collected_codes)} "
-                  f"(created: {created}, skipped: {skipped}, errors: {errors})")
-
-    print(f"\nDone! Created: {created} | Skipped (existing): {skipped} | Errors: {errors}")
+    print(f"\nDone! Collected: {collected} | Created: {created} "
+          f"| Skipped (existing): {skipped} | Errors: {errors}")
     print(f"Images saved to: {output_dir.resolve()}")
 
 
@@ -225,7 +406,7 @@ def main() -> None:
         "--delay", "-d",
         type=float,
         default=0.5,
-        help="Delay in seconds between API requests (default: 0.5)",
+        help="Delay in seconds between windows of API requests (default: 0.5)",
     )
     parser.add_argument(
         "--timeframe",
@@ -234,6 +415,13 @@ def main() -> None:
         choices=[30, 365, 4000],
         help="Timeframe for 'popular' sort: 30 (month), 365 (year), 4000 (all time). Default: 4000",
     )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=3600,
+        help="Seconds a cached list of palette codes stays valid; a fresh "
+             "cache skips the feed crawl entirely (default: 3600)",
+    )
     parser.add_argument(
         "--list-categories",
         action="store_true",
@@ -266,6 +454,7 @@ def main() -> None:
         sort=args.sort,
         delay=args.delay,
         timeframe=args.timeframe,
+        cache_ttl=args.cache_ttl,
     )
 
 
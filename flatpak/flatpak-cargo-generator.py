@@ -13,61 +13,102 @@ import sys
 import argparse
 
 try:
-    import toml
+    import tomllib  # Python 3.11+
 except ImportError:
-    print("Error: 'toml' module required.  pip install toml", file=sys.stderr)
-    sys.exit(1)
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+if tomllib is None:
+    # Last resort: the old pure-Python 'toml' package (much slower)
+    try:
+        import toml
+    except ImportError:
+        print("Error: a TOML parser is required.  pip install tomli",
+              file=sys.stderr)
+        sys.exit(1)
 
+try:
+    import orjson  # much faster serializer; stdlib json works fine without it
+except ImportError:
+    orjson = None
 
-def main():
-    parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("lockfile", nargs="?", default="Cargo.lock",
-                        help="Path to Cargo.lock (default: Cargo.lock)")
-    parser.add_argument("-o", "--output", default="cargo-sources.json",
-                        help="Output JSON file (default: cargo-sources.json)")
-    args = parser.parse_args()
-
-    with open(args.lockfile) as f:
-        lock = toml.load(f)
-
-    sources = []
-    for pkg in lock.get("package", []):
-        name = pkg["name"]
-        version = pkg["version"]
-        source = pkg.get("source", "")
-        checksum = pkg.get("checksum", "")
 
-        # Skip non-registry packages (path deps, git deps, the root package)
-        if not source or "registry" not in source:
-            continue
-        if not checksum:
-            continue
+# Bound .format methods so the templates are parsed once, not per crate
+_CRATE_URL = "https://static.crates.io/crates/{0}/{0}-{1}.crate".format
+_CRATE_DIR = "cargo/vendor/{}-{}".format
 
-        crate_dir = f"cargo/vendor/{name}-{version}"
 
+def crate_sources(name, version, checksum):
+    """Return the pair of source entries for one crates.io package."""
+    crate_dir = _CRATE_DIR(name, version)
+    return (
         # Download and unpack the crate archive (.crate = tar.gz)
-        sources.append({
+        {
             "type": "archive",
             "archive-type": "tar-gzip",
-            "url": f"https://static.crates.io/crates/{name}/{name}-{version}.crate",
+            "url": _CRATE_URL(name, version),
             "sha256": checksum,
             "strip-components": 1,
             "dest": crate_dir
-        })
-
-        # Create .cargo-checksum.json (required by cargo for vendored crates)
-        sources.append({
+        },
+        # Create .cargo-checksum.json (required by cargo for vendored crates).
+        # Built as an f-string — checksums are plain hex, so there is nothing
+        # to escape and no need to run json.dumps per crate.
+        {
             "type": "inline",
-            "contents": json.dumps({"files": {}, "package": checksum}),
+            "contents": f'{{"files": {{}}, "package": "{checksum}"}}',
             "dest": crate_dir,
             "dest-filename": ".cargo-checksum.json"
-        })
+        },
+    )
+
+
+def iter_sources(packages):
+    """Yield source entries per crates.io package, lazily.
+
+    Non-registry packages (path deps, git deps, the root package) are
+    skipped on the 'source' key alone, before any other key is touched —
+    a Cargo.lock can carry plenty of them.
+    """
+    for pkg in packages:
+        source = pkg.get("source")
+        if not source or "registry" not in source:
+            continue
+        checksum = pkg.get("checksum")
+        if not checksum:
+            continue
+        yield from crate_sources(pkg["name"], pkg["version"], checksum)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("lockfile", nargs="?", default="Cargo.lock",
+                        help="Path to Cargo.lock (default: Cargo.lock)")
+    parser.add_argument("-o", "--output", default="cargo-sources.json",
+                        help="Output JSON file (default: cargo-sources.json)")
+    args = parser.parse_args()
+
+    if tomllib is not None:
+        with open(args.lockfile, "rb") as f:
+            lock = tomllib.load(f)
+    else:
+        with open(args.lockfile) as f:
+            lock = toml.load(f)
+
+    sources = list(iter_sources(lock.get("package", [])))
 
     print(f"Generated {len(sources) // 2} crate sources", file=sys.stderr)
 
-    with open(args.output, "w") as f:
-        json.dump(sources, f, indent=4)
-        f.write("\n")
+    if orjson is not None:
+        with open(args.output, "wb") as f:
+            f.write(orjson.dumps(sources, option=orjson.OPT_INDENT_2))
+            f.write(b"\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(sources, f, indent=2)
+            f.write("\n")
 
     print(f"Written to {args.output}", file=sys.stderr)
 